@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from . import jsonutil
+from .schemas import ChatResponse, Message
+
+
+def request_key(messages: List[Message], prd_json: bytes) -> str:
+    """
+    Stable digest of a chat request: the PRD as canonical (sorted-key) JSON
+    bytes, followed by the messages.
+    """
+    h = hashlib.blake2b(prd_json, digest_size=16)
+    h.update(jsonutil.dumps([m.model_dump() for m in messages], sort_keys=True))
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    In-process LRU of ChatResponse objects keyed by request_key().
+
+    lock(key) serializes concurrent callers for the same key so that only the
+    first one pays for the LLM call; the rest find the entry on their re-check.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, ChatResponse]" = OrderedDict()
+        self._locks: Dict[str, List[Any]] = {}
+
+    def get(self, key: str) -> Optional[ChatResponse]:
+        hit = self._entries.get(key)
+        if hit is None:
+            return None
+        self._entries.move_to_end(key)
+        return hit.model_copy(deep=True)
+
+    def put(self, key: str, value: ChatResponse) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value.model_copy(deep=True)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    @asynccontextmanager
+    async def lock(self, key: str) -> AsyncIterator[None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
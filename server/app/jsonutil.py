@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None  # type: ignore[assignment]
+
+
+def dumps(obj: Any, *, sort_keys: bool = False) -> bytes:
+    """
+    Serialize to compact UTF-8 JSON bytes (non-ASCII is not escaped).
+    Objects orjson refuses (e.g. integers beyond 64 bits) go through stdlib json.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parse JSON text or bytes. Input orjson rejects (e.g. very deep nesting) is
+    retried with stdlib json, so only stdlib's errors reach the caller.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
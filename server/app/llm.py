@@ -1,14 +1,23 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import os
-from typing import Any, Dict, List, Optional, Tuple
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import islice, product
+from typing import Any, Callable, Dict, Final, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 
 import httpx
 
+from . import jsonutil
+from .cache import ResponseCache, request_key
 from .schemas import ChatResponse, Message
 
-DEBUG_LLM_RAW = os.getenv("DEBUG_LLM_RAW", "false").lower() in ("1", "true", "yes")
+_JSON_WS: Final[str] = " \t\n\r"
+
+# Below this many characters, parsing/scanning is cheaper than a thread hop.
+_OFFLOAD_MIN_CHARS: Final[int] = 64 * 1024
 
 
 def _env_bool(name: str, default: bool) -> bool:
@@ -18,86 +27,167 @@ def _env_bool(name: str, default: bool) -> bool:
     return raw.strip().lower() in ("1", "true", "yes", "y", "on")
 
 
-def _extract_json_object(text: str) -> Dict[str, Any]:
+@dataclass(frozen=True, slots=True)
+class Settings:
+    stub_mode: bool
+    api_key: str = field(repr=False)
+    base_url: str
+    model: str
+    timeout_s: float
+    provider: str
+    stream: bool
+    debug_raw: bool
+    cache_size: int
+    skip_when_complete: bool
+    # Derived once from the fields above.
+    url: str
+    headers: Dict[str, str] = field(repr=False)
+    system_message: Dict[str, Any] = field(repr=False)
+
+
+@lru_cache(maxsize=1)
+def _settings() -> Settings:
     """
-    Best-effort JSON object extraction.
-    Expectation: model returns ONLY JSON, but this guards against minor leakage.
+    Read the LLM env vars once; see call_llm for the list.
     """
-    s = text.strip()
-    if s.startswith("{") and s.endswith("}"):
-        return json.loads(s)
+    api_key = os.getenv("LLM_API_KEY", "")
+    base_url = os.getenv("LLM_BASE_URL", "")
+    provider = os.getenv("LLM_PROVIDER", "openai").strip().lower()
+
+    # The system prompt is static, so keep it as the first message: OpenAI-compatible
+    # servers cache the shared prefix automatically; Anthropic needs an explicit marker.
+    system_content: Any = _SYSTEM_PROMPT
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    if provider == "anthropic":
+        system_content = [
+            {"type": "text", "text": _SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}},
+        ]
+        headers["anthropic-beta"] = "prompt-caching-2024-07-31"
+
+    return Settings(
+        stub_mode=_env_bool("STUB_MODE", True),
+        api_key=api_key,
+        base_url=base_url,
+        model=os.getenv("LLM_MODEL", ""),
+        timeout_s=float(os.getenv("LLM_TIMEOUT_S", "30")),
+        provider=provider,
+        stream=_env_bool("LLM_STREAM", False),
+        debug_raw=_env_bool("DEBUG_LLM_RAW", False),
+        cache_size=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+        skip_when_complete=_env_bool("LLM_SKIP_WHEN_COMPLETE", False),
+        url=base_url.rstrip("/") + "/v1/chat/completions",
+        headers=headers,
+        system_message={"role": "system", "content": system_content},
+    )
 
-    start = s.find("{")
-    end = s.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        raise ValueError("No JSON object found in model output.")
-    return json.loads(s[start : end + 1])
 
+@lru_cache(maxsize=1)
+def _response_cache() -> ResponseCache:
+    return ResponseCache(maxsize=_settings().cache_size)
 
-def _build_system_prompt() -> str:
-    return (
-        "You are a PRD assistant.\n"
-        "Return ONLY one JSON object and nothing else. No markdown. No code fences. No extra text.\n"
-        "\n"
-        "Your output MUST follow this exact JSON schema:\n"
-        "{\n"
-        '  \"assistant_text\": string,\n'
-        '  \"questions\": string[] ,\n'
-        '  \"prd\": {\n'
-        '    \"problem\": string,\n'
-        '    \"users\": string[],\n'
-        '    \"goals\": string[],\n'
-        '    \"metrics\": string[],\n'
-        '    \"requirements\": string[],\n'
-        '    \"open_questions\": string[]\n'
-        "  }\n"
-        "}\n"
-        "\n"
-        "Field definitions:\n"
-        "- prd.problem: a short user pain/problem statement (6-12 words). Not a product description like \"an app for ...\".\n"
-        "- prd.users/goals/metrics/requirements/open_questions: arrays of short strings.\n"
-        "\n"
-        "Conversation policy:\n"
-        "- Ask at most ONE question per turn.\n"
-        "- assistant_text must contain exactly that one question (no extra questions, no fluff).\n"
-        "- questions[] must contain exactly the same one question (or be empty if you ask none).\n"
-        "- prd.open_questions[] must be IDENTICAL to questions[] (same items, same order).\n"
-        "- Do NOT ask definition/clarification questions like \"What do you mean by X?\" or \"Can you define X?\".\n"
-        "- Avoid generic filler (e.g., \"This app should help users...\"). Be direct.\n"
-        "\n"
-        "Question priority (choose the next missing piece):\n"
-        "1) goals (primary goal/outcome)\n"
-        "2) metrics (1-3 ways to measure success)\n"
-        "3) requirements (must-have features/constraints)\n"
-        "Only ask about pain points or workflows if the above are already filled.\n"
-        "\n"
-        "Extraction/update rules:\n"
-        "- Always keep all prd keys present in the output, even if empty.\n"
-        "- prd.open_questions[] must be identical to questions[] in EVERY response.\n"
-        "- If the user statement clearly implies a user group, fill prd.users immediately.\n"
-        "- If you ask one question, prd.open_questions[] MUST contain that question.\n"
-        "- If the user provides goals/metrics/requirements/users in their message, extract them and update the arrays.\n"
-        "- Do not delete existing prd items unless the user explicitly changes them.\n"
-        "- When you ask a question, do not update prd fields speculatively in the same turn (besides problem/users if obvious).\n"
-        "\n"
-        "Problem filling rules:\n"
-        "- Always set prd.problem.\n"
-        "- If the user only says they want a PRD for a product, infer a reasonable pain statement.\n"
-        "- If you cannot infer, use a generic pain statement related to the product domain.\n"
-        "\n"
-        "Formatting rules:\n"
-        "- questions[] length must be 0 or 1.\n"
-        "- Keep strings short. No paragraphs.\n"
-        "Question style:\n"
-        "- The single question must be short and direct (max 12 words).\n"
-        "- Avoid repeating the user/product phrase in the question.\n"
-        "- Prefer templates like:\n"
-        "  - \"What is the primary goal you want?\"\n"
-        "  - \"How will you measure success (1–3 metrics)?\"\n"
-        "  - \"What are the must-have features?\"\n"
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Pooled client shared across requests (created once at app startup).
+    Reading the settings here also surfaces malformed env vars at startup.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(_settings().timeout_s),
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
     )
 
 
+def _extract_json_object(text: str) -> Dict[str, Any]:
+    """
+    Best-effort JSON object extraction.
+    Expectation: model returns ONLY JSON, but this guards against minor leakage.
+    """
+    # Fast path: bare object, possibly padded with whitespace. Checking the first and
+    # last non-whitespace chars avoids a strip() copy. When they are "{" and "}", the
+    # find/rfind slice below would be the same text, so a parse error is final.
+    i, j = 0, len(text) - 1
+    while i < j and text[i] in _JSON_WS:
+        i += 1
+    while j > i and text[j] in _JSON_WS:
+        j -= 1
+    if j > i and text[i] == "{" and text[j] == "}":
+        return jsonutil.loads(text)
+
+    # First "{" through last "}", for output with leading/trailing chatter.
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end == -1 or end <= start:
+        raise ValueError("No JSON object found in model output.")
+    return jsonutil.loads(text[start : end + 1])
+
+
+_SYSTEM_PROMPT: Final[str] = (
+    "You are a PRD assistant.\n"
+    "Return ONLY one JSON object and nothing else. No markdown. No code fences. No extra text.\n"
+    "\n"
+    "Your output MUST follow this exact JSON schema:\n"
+    "{\n"
+    '  \"assistant_text\": string,\n'
+    '  \"questions\": string[] ,\n'
+    '  \"prd\": {\n'
+    '    \"problem\": string,\n'
+    '    \"users\": string[],\n'
+    '    \"goals\": string[],\n'
+    '    \"metrics\": string[],\n'
+    '    \"requirements\": string[],\n'
+    '    \"open_questions\": string[]\n'
+    "  }\n"
+    "}\n"
+    "\n"
+    "Field definitions:\n"
+    "- prd.problem: a short user pain/problem statement (6-12 words). Not a product description like \"an app for ...\".\n"
+    "- prd.users/goals/metrics/requirements/open_questions: arrays of short strings.\n"
+    "\n"
+    "Conversation policy:\n"
+    "- Ask at most ONE question per turn.\n"
+    "- assistant_text must contain exactly that one question (no extra questions, no fluff).\n"
+    "- questions[] must contain exactly the same one question (or be empty if you ask none).\n"
+    "- prd.open_questions[] must be IDENTICAL to questions[] (same items, same order).\n"
+    "- Do NOT ask definition/clarification questions like \"What do you mean by X?\" or \"Can you define X?\".\n"
+    "- Avoid generic filler (e.g., \"This app should help users...\"). Be direct.\n"
+    "\n"
+    "Question priority (choose the next missing piece):\n"
+    "1) goals (primary goal/outcome)\n"
+    "2) metrics (1-3 ways to measure success)\n"
+    "3) requirements (must-have features/constraints)\n"
+    "Only ask about pain points or workflows if the above are already filled.\n"
+    "\n"
+    "Extraction/update rules:\n"
+    "- Always keep all prd keys present in the output, even if empty.\n"
+    "- prd.open_questions[] must be identical to questions[] in EVERY response.\n"
+    "- If the user statement clearly implies a user group, fill prd.users immediately.\n"
+    "- If you ask one question, prd.open_questions[] MUST contain that question.\n"
+    "- If the user provides goals/metrics/requirements/users in their message, extract them and update the arrays.\n"
+    "- Do not delete existing prd items unless the user explicitly changes them.\n"
+    "- When you ask a question, do not update prd fields speculatively in the same turn (besides problem/users if obvious).\n"
+    "\n"
+    "Problem filling rules:\n"
+    "- Always set prd.problem.\n"
+    "- If the user only says they want a PRD for a product, infer a reasonable pain statement.\n"
+    "- If you cannot infer, use a generic pain statement related to the product domain.\n"
+    "\n"
+    "Formatting rules:\n"
+    "- questions[] length must be 0 or 1.\n"
+    "- Keep strings short. No paragraphs.\n"
+    "Question style:\n"
+    "- The single question must be short and direct (max 12 words).\n"
+    "- Avoid repeating the user/product phrase in the question.\n"
+    "- Prefer templates like:\n"
+    "  - \"What is the primary goal you want?\"\n"
+    "  - \"How will you measure success (1–3 metrics)?\"\n"
+    "  - \"What are the must-have features?\"\n"
+)
+
+
+
+_PRD_LIST_KEYS: Final[FrozenSet[str]] = frozenset(("users", "goals", "metrics", "requirements", "open_questions"))
+
 
 def _ensure_prd_shape(prd: dict) -> dict:
     if not isinstance(prd, dict):
@@ -111,31 +201,61 @@ def _ensure_prd_shape(prd: dict) -> dict:
     return prd
 
 
-def _build_user_context(messages: List[Message], prd: Optional[Dict[str, Any]]) -> str:
-    prd_json = json.dumps(prd or {}, ensure_ascii=False)
-    convo_lines: List[str] = []
-    for m in messages:
-        role = m.role.strip().lower()
-        convo_lines.append(f"{role}: {m.content}")
-    convo = "\n".join(convo_lines)
+def _build_user_context(messages: List[Message], prd_json: bytes) -> str:
+    # Role is a validated Literal, already lowercase.
+    return "".join((
+        "Current PRD (may be empty):\n",
+        prd_json.decode("utf-8"),
+        "\n\nConversation so far:\n",
+        "\n".join([f"{m.role}: {m.content}" for m in messages]),
+        "\n",
+    ))
 
-    return (
-        "Current PRD (may be empty):\n"
-        f"{prd_json}\n\n"
-        "Conversation so far:\n"
-        f"{convo}\n"
+
+# Inline labels the stub extracts from the last user message. The scan runs left to
+# right, so "success metrics:" is consumed from its "s" and the "metrics:" inside it
+# is never matched separately; alternation order does not matter here.
+_STUB_LABEL_RE = re.compile(r"target users:|goal:|success metrics:|metrics:", re.IGNORECASE)
+
+
+def _last_user_content(messages: List[Message]) -> str:
+    for m in reversed(messages):
+        if m.role == "user":
+            return m.content
+    return ""
+
+
+_STUB_QUESTIONS: Final[Tuple[str, ...]] = (
+    "Who is the target user for this product?",
+    "What is the primary goal or outcome you want?",
+    "How will you measure success (1–3 metrics)?",
+)
+
+
+def _stub_reply(shape: Tuple[bool, ...]) -> Tuple[Tuple[str, ...], str]:
+    questions = tuple(q for q, filled in zip(_STUB_QUESTIONS, shape) if not filled)
+    assistant_text = (
+        "Got it. I can start drafting a PRD. "
+        "Answer these questions so I can refine it:\n"
+        + "\n".join([f"- {q}" for q in questions])
+        if questions
+        else "Thanks. I updated the PRD based on your latest input."
     )
+    return questions, assistant_text
+
+
+# (has users, has goals, has metrics) -> (questions, assistant_text), precomputed
+# for all eight shapes so the stub does a single lookup per request.
+_STUB_REPLIES: Final[Dict[Tuple[bool, ...], Tuple[Tuple[str, ...], str]]] = {
+    shape: _stub_reply(shape) for shape in product((False, True), repeat=3)
+}
 
 
 def _stub_response(messages: List[Message], prd: Optional[Dict[str, Any]]) -> ChatResponse:
     """
     Offline stub so the rest of the system can be built without a real LLM call.
     """
-    last_user = ""
-    for m in reversed(messages):
-        if m.role.lower() == "user":
-            last_user = m.content
-            break
+    last_user = _last_user_content(messages)
 
     existing = prd or {}
     # Minimal PRD shape (you can expand later)
@@ -148,68 +268,69 @@ def _stub_response(messages: List[Message], prd: Optional[Dict[str, Any]]) -> Ch
         "open_questions": existing.get("open_questions", []),
     }
 
-    questions: List[str] = []
-    if not base_prd["users"]:
-        questions.append("Who is the target user for this product?")
-    if not base_prd["goals"]:
-        questions.append("What is the primary goal or outcome you want?")
-    if not base_prd["metrics"]:
-        questions.append("How will you measure success (1–3 metrics)?")
-
-    assistant_text = (
-        "Got it. I can start drafting a PRD. "
-        "Answer these questions so I can refine it:\n"
-        + "\n".join([f"- {q}" for q in questions])
-        if questions
-        else "Thanks. I updated the PRD based on your latest input."
-    )
+    shape = (bool(base_prd["users"]), bool(base_prd["goals"]), bool(base_prd["metrics"]))
+    questions, assistant_text = _STUB_REPLIES[shape]
 
     if not base_prd["problem"] and last_user:
         base_prd["problem"] = last_user.strip()
 
-    text = last_user.strip()
+    # Labels only fill empty fields, so a fully answered shape needs no scan.
+    if not all(shape):
+        text = last_user.strip()
 
-    def _grab(after: str) -> str:
-        idx = text.lower().find(after.lower())
-        if idx == -1:
-            return ""
-        start = idx + len(after)
-        # stop at next label if present
-        stops = []
-        for label in ["goal:", "success metrics:", "metrics:", "target users:"]:
-            j = text.lower().find(label, start)
-            if j != -1:
-                stops.append(j)
-        end = min(stops) if stops else len(text)
-        return text[start:end].strip(" .;\n\t")
+        # One pass over the text: each label's value runs up to the next label.
+        spans = [(m.group(0).lower(), m.start(), m.end()) for m in _STUB_LABEL_RE.finditer(text)]
+        found: Dict[str, str] = {}
+        for i, (label, _, end) in enumerate(spans):
+            if label in found:
+                continue
+            stop = spans[i + 1][1] if i + 1 < len(spans) else len(text)
+            found[label] = text[end:stop].strip(" .;\n\t")
 
-    users_str = _grab("target users:")
-    goal_str = _grab("goal:")
-    metrics_str = _grab("success metrics:")
-    if not metrics_str:
-        metrics_str = _grab("metrics:")
+        users_str = found.get("target users:", "")
+        goal_str = found.get("goal:", "")
+        metrics_str = found.get("success metrics:", "")
+        if not metrics_str:
+            metrics_str = found.get("metrics:", "")
 
-    if users_str and not base_prd["users"]:
-        base_prd["users"] = [users_str]
+        if users_str and not base_prd["users"]:
+            base_prd["users"] = [users_str]
 
-    if goal_str and not base_prd["goals"]:
-        base_prd["goals"] = [goal_str]
+        if goal_str and not base_prd["goals"]:
+            base_prd["goals"] = [goal_str]
 
-    if metrics_str and not base_prd["metrics"]:
-        # allow comma-separated
-        parts = [p.strip() for p in metrics_str.split(",") if p.strip()]
-        base_prd["metrics"] = parts if parts else [metrics_str]
+        if metrics_str and not base_prd["metrics"]:
+            # allow comma-separated
+            parts = [p.strip() for p in metrics_str.split(",") if p.strip()]
+            base_prd["metrics"] = parts if parts else [metrics_str]
 
-    return ChatResponse(assistant_text=assistant_text, questions=questions[:3], prd=base_prd)
+    return ChatResponse(assistant_text=assistant_text, questions=list(questions), prd=base_prd)
 
 
-async def call_llm(messages: List[Message], prd: Optional[Dict[str, Any]]) -> ChatResponse:
+async def _run_cpu_bound(size: int, fn: Callable[..., ChatResponse], *args: Any) -> ChatResponse:
+    """
+    Run fn inline for typical inputs; move it off the event loop when the text
+    it has to scan is large enough to stall other requests.
+    """
+    if size < _OFFLOAD_MIN_CHARS:
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+
+async def call_llm(
+    messages: List[Message],
+    prd: Optional[Dict[str, Any]],
+    client: Optional[httpx.AsyncClient] = None,
+) -> ChatResponse:
     """
     Returns ChatResponse:
       - assistant_text
       - questions (0..3)
       - prd (full PRD object)
 
+    Pass the app's shared client to reuse pooled connections; without one a
+    short-lived client is opened for this call.
+
     To keep things simple:
       - If STUB_MODE=true, returns a deterministic stub response.
       - Otherwise, calls an OpenAI-compatible chat completions endpoint.
@@ -220,90 +341,186 @@ async def call_llm(messages: List[Message], prd: Optional[Dict[str, Any]]) -> Ch
       - LLM_MODEL      (e.g., gpt-4.1-mini or any model your provider supports)
     Optional:
       - LLM_TIMEOUT_S  (default 30)
+      - LLM_CACHE_SIZE (default 1024; 0 disables the response cache)
+      - LLM_PROVIDER   (default openai; "anthropic" marks the system prompt as cacheable)
+      - LLM_STREAM     (default false; read the completion as server-sent events)
+      - LLM_SKIP_WHEN_COMPLETE (default false; answer without the model once
+        goals, metrics and requirements are all filled. Later edits from the
+        user are then ignored, so only enable it for finalize-only flows)
       - STUB_MODE      (default true for development)
-    """
-    if _env_bool("STUB_MODE", True):
-        return _stub_response(messages, prd)
-
-    api_key = os.getenv("LLM_API_KEY")
-    base_url = os.getenv("LLM_BASE_URL")
-    model = os.getenv("LLM_MODEL")
+      - DEBUG_LLM_RAW  (default false; print the raw model output)
 
-    if not api_key or not base_url or not model:
+    Env vars are read once per process (see _settings).
+    """
+    cfg = _settings()
+
+    # Opt-in: a complete PRD gets an empty reply anyway (see _parse_and_merge), but
+    # the model could still have merged edits from the latest message.
+    if cfg.skip_when_complete and prd is not None and _is_complete(prd):
+        done = _ensure_prd_shape(prd)
+        return ChatResponse(assistant_text="", questions=[], prd={**done, "open_questions": []})
+
+    if cfg.stub_mode:
+        # Size by the message the stub actually scans.
+        size = len(_last_user_content(messages))
+        return await _run_cpu_bound(size, _stub_response, messages, prd)
+
+    # Serialized once (before _call_provider mutates prd in place) and shared by
+    # the cache key and the prompt.
+    prd_json = jsonutil.dumps(prd or {}, sort_keys=True)
+
+    cache = _response_cache()
+    if cache.maxsize <= 0:
+        return await _call_provider(cfg, messages, prd, prd_json, client)
+
+    key = request_key(messages, prd_json)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    async with cache.lock(key):
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        result = await _call_provider(cfg, messages, prd, prd_json, client)
+        cache.put(key, result)
+    return result
+
+
+async def _call_provider(
+    cfg: Settings,
+    messages: List[Message],
+    prd: Optional[Dict[str, Any]],
+    prd_json: bytes,
+    client: Optional[httpx.AsyncClient],
+) -> ChatResponse:
+    if not cfg.api_key or not cfg.base_url or not cfg.model:
         raise RuntimeError("Missing LLM_API_KEY, LLM_BASE_URL, or LLM_MODEL in environment.")
 
-    timeout_s = float(os.getenv("LLM_TIMEOUT_S", "30"))
-
-    system_prompt = _build_system_prompt()
-    user_context = _build_user_context(messages, prd)
+    user_context = _build_user_context(messages, prd_json)
 
     payload = {
-        "model": model,
+        "model": cfg.model,
         "messages": [
-            {"role": "system", "content": system_prompt},
+            cfg.system_message,
             {"role": "user", "content": user_context},
         ],
         "temperature": 0.2,
     }
+    if cfg.stream:
+        payload["stream"] = True
 
-    url = base_url.rstrip("/") + "/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {api_key}"}
+    body = jsonutil.dumps(payload)
+    if client is not None:
+        content = await _fetch_content(client, cfg.url, body, cfg.headers, cfg.stream)
+    else:
+        async with httpx.AsyncClient(timeout=cfg.timeout_s) as owned:
+            content = await _fetch_content(owned, cfg.url, body, cfg.headers, cfg.stream)
+
+    if cfg.debug_raw:
+        print("\n================ LLM RAW OUTPUT ================\n")
+        print(content)
+        print("\n================ END LLM RAW OUTPUT ============\n")
+
+    return await _run_cpu_bound(len(content), _parse_and_merge, content, prd)
 
-    async with httpx.AsyncClient(timeout=timeout_s) as client:
-        resp = await client.post(url, json=payload, headers=headers)
+
+async def _fetch_content(
+    client: httpx.AsyncClient,
+    url: str,
+    body: bytes,
+    headers: Dict[str, str],
+    stream: bool,
+) -> str:
+    """
+    POST the completion request and return the assistant message text.
+    """
+    if not stream:
+        resp = await client.post(url, content=body, headers=headers)
+        resp.raise_for_status()
+        data = jsonutil.loads(resp.content)
+        try:
+            return data["choices"][0]["message"]["content"]
+        except Exception as e:
+            raise RuntimeError(f"Unexpected LLM response format: {data}") from e
+
+    # SSE: "data: {chunk}" lines carrying choices[0].delta.content, ending with "data: [DONE]".
+    parts: List[str] = []
+    async with client.stream("POST", url, content=body, headers=headers) as resp:
+        if resp.is_error:
+            await resp.aread()
         resp.raise_for_status()
-        data = resp.json()
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            chunk = line[5:].strip()
+            if chunk == "[DONE]":
+                break
+            try:
+                choices = jsonutil.loads(chunk).get("choices") or []
+                delta = (choices[0].get("delta") or {}) if choices else {}
+                text = delta.get("content") or ""
+                if not isinstance(text, str):
+                    raise TypeError("delta.content is not a string")
+            except Exception as e:
+                raise RuntimeError(f"Unexpected LLM stream chunk: {chunk}") from e
+            parts.append(text)
+    return "".join(parts)
+
+
+def _clean_strings(xs: Iterable[Any]) -> Iterator[str]:
+    for x in xs:
+        s = str(x).strip()
+        if s:
+            yield s
+
+
+def _has_items(xs: Any) -> bool:
+    if not isinstance(xs, list):
+        return False
+    for x in xs:
+        # Parsed JSON strings are exact str; skip the isinstance MRO walk.
+        if type(x) is str and x.strip():
+            return True
+    return False
 
-    try:
-        content = data["choices"][0]["message"]["content"]
-        if DEBUG_LLM_RAW:
-            print("\n================ LLM RAW OUTPUT ================\n")
-            print(content)
-            print("\n================ END LLM RAW OUTPUT ============\n")
-    except Exception as e:
-        raise RuntimeError(f"Unexpected LLM response format: {data}") from e
 
-    obj = _extract_json_object(content)
+def _is_complete(prd: Dict[str, Any]) -> bool:
+    return (
+        _has_items(prd.get("goals")) and
+        _has_items(prd.get("metrics")) and
+        _has_items(prd.get("requirements"))
+    )
 
-    new_prd = _ensure_prd_shape(obj.get("prd", {}))
-    old_prd = _ensure_prd_shape(prd or {})
 
-    merged = dict(old_prd)
-    for k, v in new_prd.items():
-        if k == "problem":
-            if isinstance(v, str) and v.strip():
-                merged[k] = v
-        else:
-            if isinstance(v, list) and len(v) > 0:
-                merged[k] = v
+def _parse_and_merge(content: str, prd: Optional[Dict[str, Any]]) -> ChatResponse:
+    obj = _extract_json_object(content)
+
+    new_prd = obj.get("prd", {})
+    if not isinstance(new_prd, dict):
+        new_prd = {}
+    # The request owns prd (and _ensure_prd_shape already fills it in place), so
+    # update it directly rather than copying.
+    merged = _ensure_prd_shape(prd or {})
+
+    # Take non-empty values from the model; anything else keeps the old value.
+    merged.update(
+        (k, v)
+        for k, v in new_prd.items()
+        if (k in _PRD_LIST_KEYS and isinstance(v, list) and v)
+        or (k == "problem" and isinstance(v, str) and v.strip())
+    )
 
     assistant_text = str(obj.get("assistant_text", "")).strip()
     questions_raw = obj.get("questions", [])
-    prd_obj = obj.get("prd", {})
 
     if not isinstance(questions_raw, list):
         questions_raw = []
 
-    questions = [str(x).strip() for x in questions_raw if str(x).strip()][:3]
-    if not isinstance(prd_obj, dict):
-        prd_obj = {}
-
-    def _has_items(xs: Any) -> bool:
-        if not isinstance(xs, list):
-            return False
-        for x in xs:
-            if isinstance(x, str) and x.strip():
-                return True
-        return False
-
-    is_complete = (
-        _has_items(merged.get("goals")) and
-        _has_items(merged.get("metrics")) and
-        _has_items(merged.get("requirements"))
-    )
+    questions = list(islice(_clean_strings(questions_raw), 3))
 
     # If complete, stop asking
-    if is_complete:
+    if _is_complete(merged):
         assistant_text = ""
         questions = []
         merged["open_questions"] = []
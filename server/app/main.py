@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from .llm import call_llm
-from .schemas import ChatRequest, ChatResponse
+from .llm import call_llm, create_http_client
+from .schemas import CHAT_RESP_ADAPTER, ChatRequest, ChatResponse
 
 
 def _get_port() -> int:
@@ -17,8 +19,17 @@ def _get_port() -> int:
         return 3001
 
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    app.state.http = create_http_client()
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="PRD Builder API", version="0.1.0")
+    app = FastAPI(title="PRD Builder API", version="0.1.0", lifespan=_lifespan)
 
     allowed_origins = [
         "http://localhost:5173",
@@ -38,8 +49,11 @@ def create_app() -> FastAPI:
         return {"ok": True}
 
     @app.post("/api/chat", response_model=ChatResponse)
-    async def chat(req: ChatRequest) -> ChatResponse:
-        return await call_llm(req.messages, req.prd)
+    async def chat(req: ChatRequest, request: Request) -> Response:
+        result = await call_llm(req.messages, req.prd, request.app.state.http)
+        # Already a validated ChatResponse: serialize directly instead of letting
+        # FastAPI re-validate it through response_model (kept for the docs).
+        return Response(content=CHAT_RESP_ADAPTER.dump_json(result), media_type="application/json")
 
     return app
 
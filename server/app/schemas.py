@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 Role = Literal["user", "assistant", "system"]
@@ -22,3 +22,7 @@ class ChatResponse(BaseModel):
     assistant_text: str
     questions: List[str] = Field(default_factory=list, max_length=3)
     prd: Dict[str, Any] = Field(default_factory=dict)
+
+
+# Built once at import; dump_json serializes straight to bytes in pydantic-core.
+CHAT_RESP_ADAPTER: TypeAdapter[ChatResponse] = TypeAdapter(ChatResponse)
@@ -0,0 +1,21 @@
+from typing import Iterator
+
+import pytest
+
+from app import llm
+
+
+@pytest.fixture
+def provider_env(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """
+    Real-provider settings pointing at a fake endpoint; pair with httpx.MockTransport.
+    """
+    monkeypatch.setenv("STUB_MODE", "false")
+    monkeypatch.setenv("LLM_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_BASE_URL", "http://llm.test")
+    monkeypatch.setenv("LLM_MODEL", "test-model")
+    llm._settings.cache_clear()
+    llm._response_cache.cache_clear()
+    yield
+    llm._settings.cache_clear()
+    llm._response_cache.cache_clear()
@@ -0,0 +1,92 @@
+import asyncio
+import json
+from typing import List
+
+import httpx
+import pytest
+
+from app.cache import ResponseCache
+from app.llm import call_llm
+from app.schemas import ChatResponse, Message
+
+_MODEL_OUTPUT = json.dumps({
+    "assistant_text": "What are the must-have features?",
+    "questions": ["What are the must-have features?"],
+    "prd": {"problem": "Students lose notes", "goals": ["faster review"]},
+})
+
+
+def _provider(calls: List[httpx.Request], delay: float = 0.0) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"choices": [{"message": {"content": _MODEL_OUTPUT}}]})
+
+    return httpx.MockTransport(handler)
+
+
+def _messages() -> List[Message]:
+    return [Message(role="user", content="PRD for a notes app")]
+
+
+def test_exact_hit_skips_provider(provider_env: None) -> None:
+    calls: List[httpx.Request] = []
+
+    async def main() -> List[ChatResponse]:
+        async with httpx.AsyncClient(transport=_provider(calls)) as client:
+            first = await call_llm(_messages(), {"users": ["students"]}, client)
+            second = await call_llm(_messages(), {"users": ["students"]}, client)
+            other = await call_llm(_messages(), {"users": ["teachers"]}, client)
+            return [first, second, other]
+
+    first, second, other = asyncio.run(main())
+    assert len(calls) == 2
+    assert second == first
+    assert other.prd["users"] == ["teachers"]
+
+
+def test_concurrent_identical_calls_coalesce(provider_env: None) -> None:
+    calls: List[httpx.Request] = []
+
+    async def main() -> List[ChatResponse]:
+        async with httpx.AsyncClient(transport=_provider(calls, delay=0.05)) as client:
+            return await asyncio.gather(*(call_llm(_messages(), {}, client) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r == results[0] for r in results)
+
+
+def _resp(text: str) -> ChatResponse:
+    return ChatResponse(assistant_text=text, prd={"goals": [text]})
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache = ResponseCache(maxsize=2)
+    cache.put("a", _resp("a"))
+    cache.put("b", _resp("b"))
+    assert cache.get("a") is not None  # "a" is now most recent
+    cache.put("c", _resp("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+@pytest.mark.parametrize("maxsize", [0, -1])
+def test_non_positive_size_disables_cache(maxsize: int) -> None:
+    cache = ResponseCache(maxsize=maxsize)
+    cache.put("a", _resp("a"))
+    assert cache.get("a") is None
+
+
+def test_hit_returns_deep_copy() -> None:
+    cache = ResponseCache()
+    stored = _resp("a")
+    cache.put("a", stored)
+    stored.prd["goals"].append("mutated after put")
+
+    hit = cache.get("a")
+    assert hit is not None and hit.prd["goals"] == ["a"]
+    hit.prd["goals"].append("mutated by caller")
+    assert cache.get("a").prd["goals"] == ["a"]
@@ -0,0 +1,21 @@
+from app import jsonutil
+
+
+def test_big_int_dumps_falls_back_to_stdlib() -> None:
+    data = jsonutil.dumps({"n": 10**30, "a": "é"}, sort_keys=True)
+    assert data == '{"a":"é","n":1000000000000000000000000000000}'.encode("utf-8")
+
+
+def test_deep_nesting_falls_back_to_stdlib() -> None:
+    obj: list = []
+    for _ in range(300):
+        obj = [obj]
+    assert jsonutil.loads(jsonutil.dumps(obj)) == obj
+
+
+def test_invalid_json_still_raises_value_error() -> None:
+    try:
+        jsonutil.loads("{bad}")
+    except ValueError:
+        return
+    raise AssertionError("expected ValueError")
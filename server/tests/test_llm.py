@@ -0,0 +1,34 @@
+import pytest
+
+from app.llm import _extract_json_object, _last_user_content, _settings
+from app.schemas import Message
+
+
+def test_extract_bare_object() -> None:
+    assert _extract_json_object(' {"a": 1}\n') == {"a": 1}
+
+
+def test_extract_object_with_surrounding_text() -> None:
+    assert _extract_json_object('Sure: {"a": {"b": 2}} done') == {"a": {"b": 2}}
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "{" * 40000, "} {", " {bad} ", '{"a": 1'])
+def test_extract_without_object_raises(text: str) -> None:
+    with pytest.raises(ValueError):
+        _extract_json_object(text)
+
+
+def test_last_user_content_skips_trailing_assistant_turns() -> None:
+    messages = [
+        Message(role="user", content="first"),
+        Message(role="user", content="Goal: ship it"),
+        Message(role="assistant", content="ok"),
+    ]
+    assert _last_user_content(messages) == "Goal: ship it"
+    assert _last_user_content([Message(role="assistant", content="hi")]) == ""
+
+
+def test_settings_repr_hides_api_key(provider_env: None) -> None:
+    text = repr(_settings())
+    assert "test-key" not in text
+    assert "http://llm.test" in text
@@ -0,0 +1,61 @@
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import llm
+from app.main import create_app
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
+    monkeypatch.setenv("STUB_MODE", "true")
+    llm._settings.cache_clear()
+    with TestClient(create_app()) as c:
+        yield c
+    llm._settings.cache_clear()
+
+
+def test_chat_stub_reply(client: TestClient) -> None:
+    r = client.post("/api/chat", json={"messages": [{"role": "user", "content": "Target users: students"}]})
+    assert r.status_code == 200
+    assert r.json()["prd"]["users"] == ["students"]
+
+
+def test_chat_validation_error_shape(client: TestClient) -> None:
+    r = client.post("/api/chat", json={"messages": [{"role": "bogus", "content": "x"}]})
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["loc"] == ["body", "messages", 0, "role"]
+
+    r = client.post("/api/chat", content=b"{not json", headers={"Content-Type": "application/json"})
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["loc"] == ["body", 1]
+
+
+def test_openapi_documents_chat_request_and_errors(client: TestClient) -> None:
+    op = client.get("/openapi.json").json()["paths"]["/api/chat"]["post"]
+    assert set(op["responses"]) == {"200", "422"}
+    assert op["requestBody"]["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/ChatRequest"}
+
+
+_COMPLETE_PRD = {"goals": ["g"], "metrics": ["m"], "requirements": ["r"], "users": []}
+
+
+def test_complete_prd_still_merges_updates_by_default(client: TestClient) -> None:
+    r = client.post(
+        "/api/chat",
+        json={"messages": [{"role": "user", "content": "Target users: students"}], "prd": _COMPLETE_PRD},
+    )
+    assert r.status_code == 200
+    assert r.json()["prd"]["users"] == ["students"]
+
+
+def test_complete_prd_skip_is_opt_in(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LLM_SKIP_WHEN_COMPLETE", "true")
+    llm._settings.cache_clear()
+    r = client.post(
+        "/api/chat",
+        json={"messages": [{"role": "user", "content": "Target users: students"}], "prd": _COMPLETE_PRD},
+    )
+    body = r.json()
+    assert (body["assistant_text"], body["questions"], body["prd"]["users"]) == ("", [], [])
@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.llm import _fetch_content
+
+_URL = "http://llm.test/v1/chat/completions"
+
+
+def _sse(*lines: str) -> str:
+    return "".join(f"{line}\n" for line in lines)
+
+
+def _chunk(content: str) -> str:
+    return "data: " + json.dumps({"choices": [{"delta": {"content": content}}]})
+
+
+def _fetch(body: str, status: int = 200) -> str:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(status, text=body, headers={"content-type": "text/event-stream"})
+
+    async def main() -> str:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await _fetch_content(client, _URL, b'{"stream": true}', {}, stream=True)
+
+    return asyncio.run(main())
+
+
+def test_assembles_multi_chunk_content() -> None:
+    body = _sse(_chunk('{"assistant_'), "", _chunk('text": "hi"}'), "", "data: [DONE]", "")
+    assert _fetch(body) == '{"assistant_text": "hi"}'
+
+
+def test_stops_at_done() -> None:
+    body = _sse(_chunk("kept"), "data: [DONE]", _chunk("ignored"))
+    assert _fetch(body) == "kept"
+
+
+def test_skips_non_data_and_empty_delta_lines() -> None:
+    body = _sse(
+        ": keep-alive comment",
+        "event: message",
+        "",
+        'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+        'data: {"choices": []}',
+        _chunk("a"),
+        "id: 7",
+        _chunk("b"),
+        "data: [DONE]",
+    )
+    assert _fetch(body) == "ab"
+
+
+@pytest.mark.parametrize(
+    "bad",
+    [
+        "data: {not json",
+        'data: {"choices": [{"delta": "text"}]}',
+        'data: {"choices": [{"delta": {"content": 5}}]}',
+        "data: []",
+    ],
+)
+def test_malformed_chunk_raises_runtime_error(bad: str) -> None:
+    with pytest.raises(RuntimeError, match="Unexpected LLM stream chunk"):
+        _fetch(_sse(_chunk("ok"), bad, "data: [DONE]"))
+
+
+def test_http_error_status_raises() -> None:
+    with pytest.raises(httpx.HTTPStatusError) as exc:
+        _fetch('{"error": "rate limited"}', status=429)
+    assert exc.value.response.status_code == 429
+    assert "rate limited" in exc.value.response.text